@@ -1,37 +1,117 @@
+import logging
+import os
+from functools import lru_cache
+from dataclasses import dataclass
 from typing import Annotated
-from typing_extensions import TypedDict
 from langgraph.graph.message import add_messages
 from langchain.chat_models import init_chat_model
 from langgraph.graph import StateGraph, START, END
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_openai import OpenAIEmbeddings
+from app.semantic_cache import SemanticCache
 
-# Initialize LLM with your model (e.g., 'gpt-4o')
-llm = init_chat_model(model_provider="openai", model="gpt-4o")
+logger = logging.getLogger(__name__)
+
+MODEL_PROVIDER = "openai"
+MODEL_NAME = "gpt-4o"
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "1"))
+HISTORY_TURNS = 8  # Question/answer pairs sent to the LLM besides the leading system messages
+
+# Initialize LLM with your model (e.g., 'gpt-4o') lazily, once per process
+@lru_cache(maxsize=1)
+def _get_llm():
+    return init_chat_model(
+        model_provider=MODEL_PROVIDER,
+        model=MODEL_NAME,
+        temperature=LLM_TEMPERATURE,
+        streaming=True,
+        # Report usage (including cached prompt tokens) on streamed replies too
+        stream_usage=True,
+    )
+
+# Open the provider HTTP connection before the first real turn
+async def warm_up_llm() -> None:
+    await _get_llm().ainvoke([HumanMessage(content="hi")], max_tokens=1)
+
+# Replies are only reused when the model is deterministic
+@lru_cache(maxsize=1)
+def _get_response_cache():
+    if LLM_TEMPERATURE != 0:
+        return None
+    return SemanticCache(OpenAIEmbeddings(model="text-embedding-3-small"), threshold=0.9, context_window=4)
 
 # Define the state type
-class State(TypedDict):
+@dataclass(slots=True)
+class State:
     messages: Annotated[list, add_messages]
-    resume_content: str  # Resume text for context
+    resume_content: str = ""  # Resume text for context
 
-def chatbot(state: State) -> State:
-    messages = state["messages"]
-    resume_content = state.get("resume_content", "")
+def cacheable_system_message(text: str) -> SystemMessage:
+    # OpenAI and Gemini cache identical prompt prefixes automatically;
+    # Anthropic needs the block marked explicitly
+    if MODEL_PROVIDER == "anthropic":
+        return SystemMessage(content=[{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}])
+    return SystemMessage(content=text)
 
-    # Inject resume content as system message context before conversation
+def initial_messages(system_message: SystemMessage, resume_content: str = "") -> list:
+    # Leading messages for a new thread. The resume sits right after the system
+    # prompt so every later turn shares the same cacheable prefix.
+    messages = [system_message]
     if resume_content:
-        messages = messages + [SystemMessage(content=f"Resume context:\n{resume_content}")]
+        messages.append(cacheable_system_message(f"Resume context:\n{resume_content}"))
+    return messages
 
-    # Call the LLM with the prepared messages
-    response = llm.invoke(messages)
+def trim_history(messages: list, turns: int = HISTORY_TURNS) -> list:
+    # Keep the leading system/resume messages and the last few turns. The full
+    # history stays in checkpointed state so it can still be replayed.
+    head = 0
+    while head < len(messages) and isinstance(messages[head], SystemMessage):
+        head += 1
+    start = max(head, len(messages) - 2 * turns)
+    # Never open the window on a dangling AI reply
+    while start < len(messages) and not isinstance(messages[start], HumanMessage):
+        start += 1
+    return messages[:head] + messages[start:]
+
+async def chatbot(state: State) -> dict:
+    messages = state.messages
+
+    # Serve near-duplicate questions from the semantic cache when enabled
+    cache = _get_response_cache()
+    cache_key = None
+    if cache:
+        # The cache is an optimization; an embedding failure must not fail the turn
+        try:
+            cache_key = await cache.aembed(messages)
+        except Exception as e:
+            logger.warning("Semantic cache lookup failed, calling the LLM: %s", e)
+    cached = cache.lookup(cache_key) if cache_key else None
+    if cached is not None:
+        response = AIMessage(content=cached)
+    else:
+        # Call the LLM with a bounded window of the conversation
+        response = await _get_llm().ainvoke(trim_history(messages))
+        usage = response.usage_metadata or {}
+        logger.debug(
+            "LLM usage: input=%s cached=%s",
+            usage.get("input_tokens"),
+            usage.get("input_token_details", {}).get("cache_read", 0),
+        )
+        if cache_key:
+            cache.add(cache_key, response.content)
 
-    # Append the AI response to the messages for the next turn
-    new_messages = messages + [response]
+    # Return only the new message; the add_messages reducer appends it to state.
+    # resume_content never changes after the first turn, so it is not rewritten.
+    return {"messages": [response]}
 
-    return {
-        "messages": new_messages,
-        "resume_content": resume_content
-    }
+# One config per thread, built once and reused for every turn of that session
+@lru_cache(maxsize=1024)
+def session_config(thread_id: str) -> RunnableConfig:
+    return RunnableConfig(configurable={"thread_id": thread_id})
 
+# Compile once per checkpointer; the graph shape never changes
+@lru_cache(maxsize=4)
 def create_chat_graph(checkpointer=None):
     builder = StateGraph(State)
 
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from hashlib import blake2b
+
+import numpy as np
+from langchain_core.messages import HumanMessage, SystemMessage
+
+
+# In-memory cache of LLM replies keyed by the embedding of the recent human turns.
+# Entries are partitioned by the leading system messages (interviewer prompt and
+# resume), so a reply is only ever reused for the same prompt prefix.
+class SemanticCache:
+    def __init__(self, embeddings, threshold: float = 0.9, context_window: int = 4,
+                 max_entries: int = 256, max_partitions: int = 64):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.context_window = context_window
+        self.max_entries = max_entries
+        self.max_partitions = max_partitions
+        # partition key -> (unit vectors matrix, replies)
+        self._partitions: OrderedDict[str, tuple[np.ndarray, list[str]]] = OrderedDict()
+
+    def _partition_key(self, messages: list) -> str:
+        digest = blake2b(digest_size=16)
+        for message in messages:
+            if not isinstance(message, SystemMessage):
+                break
+            digest.update(str(message.content).encode())
+        return digest.hexdigest()
+
+    def _query_text(self, messages: list) -> str:
+        human_turns = [m.content for m in messages if isinstance(m, HumanMessage)]
+        return "\n".join(str(c) for c in human_turns[-self.context_window:])
+
+    async def aembed(self, messages: list):
+        # Returns (partition key, unit query vector), or None when there is nothing to key on
+        text = self._query_text(messages)
+        if not text:
+            return None
+        vector = np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
+        return self._partition_key(messages), vector / np.linalg.norm(vector)
+
+    def lookup(self, key) -> str | None:
+        partition_key, vector = key
+        partition = self._partitions.get(partition_key)
+        if partition is None:
+            return None
+        self._partitions.move_to_end(partition_key)
+        matrix, replies = partition
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        return replies[best] if scores[best] >= self.threshold else None
+
+    def add(self, key, reply: str) -> None:
+        partition_key, vector = key
+        matrix, replies = self._partitions.get(partition_key, (np.empty((0, vector.size), dtype=np.float32), []))
+        # Drop the oldest entry once the partition is full
+        if len(replies) >= self.max_entries:
+            matrix, replies = matrix[1:], replies[1:]
+        self._partitions[partition_key] = (np.vstack([matrix, vector]), replies + [reply])
+        self._partitions.move_to_end(partition_key)
+        if len(self._partitions) > self.max_partitions:
+            self._partitions.popitem(last=False)